@@ -0,0 +1,42 @@
+from app.config import Config
+from app.utils.logging_config import redact
+from app.utils.tracing import correlation_id_var, new_correlation_id, tracer
+
+
+class TracingMiddleware:
+    """Opens the request span and propagates the correlation id header.
+
+    A plain ASGI middleware, so untraced requests only pay for a header lookup.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = Config.CORRELATION_ID_HEADER.lower().encode('latin-1')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = None
+        for name, value in scope['headers']:
+            if name == self.header:
+                correlation_id = value.decode('latin-1')
+                break
+        correlation_id = correlation_id or new_correlation_id()
+        header = (self.header, correlation_id.encode('latin-1'))
+
+        token = correlation_id_var.set(correlation_id)
+        try:
+            # The webhook path embeds the bot token.
+            with tracer.start_as_current_span("http_request", method=scope['method'],
+                                              path=redact(scope['path'])) as span:
+                async def send_with_correlation_id(message):
+                    if message['type'] == 'http.response.start':
+                        span.set_attribute('status_code', message['status'])
+                        message['headers'] = [*message.get('headers', []), header]
+                    await send(message)
+
+                await self.app(scope, receive, send_with_correlation_id)
+        finally:
+            correlation_id_var.reset(token)
@@ -4,11 +4,14 @@ from typing import List, Optional, Union
 
 from aiogram import Bot
 from aiogram.enums import ParseMode
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field, ValidationError
 
 from app.config import Config
+from app.services.delivery_tracker import delivery_tracker
 from app.services.notification_service import send_notification_to_groups
+from app.utils.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +41,20 @@ def detect_format(text: str) -> str:
     return 'plain'
 
 
+def parse_notification(body: bytes) -> Optional[NotificationMessage]:
+    if not body:
+        return None
+    try:
+        return NotificationMessage.model_validate_json(body)
+    except ValidationError as e:
+        errors = [{**error, "loc": ("body", *error["loc"])}
+                  for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=body)
+
+
 async def get_bot():
-    bot = Bot(token=Config.BOT_TOKEN)
+    with tracer.start_as_current_span("get_bot"):
+        bot = Bot(token=Config.BOT_TOKEN)
     try:
         yield bot
     finally:
@@ -51,40 +66,52 @@ async def root():
     return {"message": "Welcome to the API!"}
 
 
-@router.post("/send_notification")
+# The body is read inside the endpoint so the parse_request span covers decoding it.
+@router.post("/send_notification", openapi_extra={"requestBody": {"content": {
+    "application/json": {"schema": NotificationMessage.model_json_schema()}}}})
 async def send_notification(
-    notification: Optional[NotificationMessage] = None,
+    request: Request,
     text: Optional[str] = Query(None),
     bot_id: Optional[str] = Query(None),
     chat_id: Optional[Union[int, List[int]]] = Query(None),
     topic_id: Optional[int] = Query(None),
     bot: Bot = Depends(get_bot)
 ):
-    message_text = text or (notification.text if notification else None) or (
-        notification.message if notification else None)
-    if not message_text:
+    if not delivery_tracker.accepting:
         raise HTTPException(
-            status_code=400, detail="Message text cannot be empty")
-
-    used_bot_id = bot_id or (
-        notification.bot_id if notification else None) or Config.BOT_TOKEN
-    used_chat_id = chat_id or (
-        notification.chat_id if notification else None) or Config.GROUP_IDS
-    used_topic_id = topic_id or (
-        notification.topic_id if notification else None)
-
-    message_format = (
-        notification.format if notification else None) or detect_format(message_text)
-
-    if message_format == 'html':
-        parse_mode = ParseMode.HTML
-    elif message_format == 'markdown':
-        parse_mode = ParseMode.MARKDOWN
-    else:
-        parse_mode = None
+            status_code=503, detail="Service is shutting down")
+
+    with tracer.start_as_current_span("parse_request") as span:
+        body = await request.body()
+        span.set_attribute("body_size", len(body))
+        notification = parse_notification(body)
+
+        message_text = text or (notification.text if notification else None) or (
+            notification.message if notification else None)
+        if not message_text:
+            raise HTTPException(
+                status_code=400, detail="Message text cannot be empty")
+
+        used_bot_id = bot_id or (
+            notification.bot_id if notification else None) or Config.BOT_TOKEN
+        used_chat_id = chat_id or (
+            notification.chat_id if notification else None) or Config.GROUP_IDS
+        used_topic_id = topic_id or (
+            notification.topic_id if notification else None)
+
+        message_format = (
+            notification.format if notification else None) or detect_format(message_text)
+
+        if message_format == 'html':
+            parse_mode = ParseMode.HTML
+        elif message_format == 'markdown':
+            parse_mode = ParseMode.MARKDOWN
+        else:
+            parse_mode = None
 
     if used_bot_id != Config.BOT_TOKEN:
-        custom_bot = Bot(token=used_bot_id)
+        with tracer.start_as_current_span("get_bot", custom=True):
+            custom_bot = Bot(token=used_bot_id)
     else:
         custom_bot = bot
 
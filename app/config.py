@@ -11,3 +11,18 @@ class Config:
     WEBHOOK_URL = os.getenv("WEBHOOK_URL")
     WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
     WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", 8000))
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+    LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", 1.0))
+    LOG_MAX_TEXT_LENGTH = int(os.getenv("LOG_MAX_TEXT_LENGTH", 100))
+    SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", 10))
+    CHECKPOINT_PATH = os.getenv(
+        "CHECKPOINT_PATH", "data/pending_notifications.json")
+    CORRELATION_ID_HEADER = os.getenv("CORRELATION_ID_HEADER", "X-Request-ID")
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+    TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "traces.jsonl")
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0.01))
+    SEND_MAX_ATTEMPTS = int(os.getenv("SEND_MAX_ATTEMPTS", 3))
+    SEND_MAX_RETRY_WAIT = float(os.getenv("SEND_MAX_RETRY_WAIT", 5))
+    TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", 10000))
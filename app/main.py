@@ -1,4 +1,5 @@
 import logging
+import math
 from contextlib import asynccontextmanager
 
 import uvicorn
@@ -7,13 +8,18 @@ from aiogram.types import WebhookInfo
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler
 from fastapi import Depends, FastAPI, Request
 
+from app.api.middleware import TracingMiddleware
 from app.api.routes import router as api_router
 from app.api.routes import router as root_router
 from app.bot.handlers import register_handlers
 from app.config import Config
+from app.services.delivery_tracker import delivery_tracker
+from app.services.notification_service import resume_pending_notifications
 from app.utils.chat_logger import log_available_chats
+from app.utils.logging_config import setup_logging, shutdown_logging
+from app.utils.tracing import shutdown_tracing, tracer
 
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 WEBHOOK_PATH = f"/bot/{Config.BOT_TOKEN}"
@@ -26,7 +32,8 @@ webhook_handler = SimpleRequestHandler(
 
 
 async def get_bot():
-    bot = Bot(token=Config.BOT_TOKEN)
+    with tracer.start_as_current_span("get_bot"):
+        bot = Bot(token=Config.BOT_TOKEN)
     try:
         yield bot
     finally:
@@ -35,27 +42,48 @@ async def get_bot():
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # uvicorn configures its own loggers after this module is imported.
+    setup_logging()
     async with Bot(token=Config.BOT_TOKEN) as bot:
         webhook_info = await bot.get_webhook_info()
         if webhook_info.url != WEBHOOK_URL:
             await bot.set_webhook(url=WEBHOOK_URL)
-        logger.info(f"Webhook set to URL: {WEBHOOK_URL}")
+        logger.info("Webhook set to URL: %s", WEBHOOK_URL)
 
         # Log available chats
         await log_available_chats(bot)
 
     webhook_handler.bot = bot
+    app.state.resumed_notifications = await resume_pending_notifications()
 
     yield
 
     logger.info("Application shutdown")
+    # DrainingServer has normally drained already; this catches jobs that uvicorn
+    # cancelled afterwards, or runs the drain when started with the plain uvicorn CLI.
+    await delivery_tracker.shutdown()
+    shutdown_tracing()
+    shutdown_logging()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(TracingMiddleware)
 
 app.include_router(api_router)
 app.include_router(root_router)
 
 
+class DrainingServer(uvicorn.Server):
+    """Drains and checkpoints notifications before uvicorn closes connections.
+
+    uvicorn only sends the lifespan shutdown event after request tasks have
+    finished or been cancelled, which is too late to save unsent chats.
+    """
+
+    async def shutdown(self, sockets=None):
+        await delivery_tracker.shutdown()
+        await super().shutdown(sockets)
+
+
 @app.post(WEBHOOK_PATH)
 async def bot_webhook(request: Request, bot: Bot = Depends(get_bot)):
     webhook_handler.bot = bot
@@ -63,4 +91,7 @@ async def bot_webhook(request: Request, bot: Bot = Depends(get_bot)):
 
 if __name__ == "__main__":
     logger.info("Starting bot...")
-    uvicorn.run(app, host=Config.WEBAPP_HOST, port=Config.WEBAPP_PORT)
+    server = DrainingServer(uvicorn.Config(
+        app, host=Config.WEBAPP_HOST, port=Config.WEBAPP_PORT, log_config=None,
+        timeout_graceful_shutdown=math.ceil(Config.SHUTDOWN_DRAIN_TIMEOUT) + 5))
+    server.run()
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+import os
+from contextlib import contextmanager
+from itertools import count
+from typing import Dict, List, Optional, Set
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+DRAIN_POLL_INTERVAL = 0.05
+
+
+class DeliveryJob:
+    """A single fan-out and the chats it has not finished yet."""
+
+    def __init__(self, job_id: int, bot_token: Optional[str], message: str,
+                 parse_mode: Optional[str], chat_ids: List[int], topic_id: Optional[int]):
+        self.id = job_id
+        self.bot_token = bot_token
+        self.message = message
+        self.parse_mode = parse_mode
+        self.pending = list(chat_ids)
+        self.topic_id = topic_id
+        self.task = asyncio.current_task()
+
+    def done(self, chat_id: int) -> None:
+        self.pending.remove(chat_id)
+
+    def to_dict(self) -> dict:
+        return {
+            'bot_token': self.bot_token,
+            'message': self.message,
+            'parse_mode': self.parse_mode,
+            'chat_ids': self.pending,
+            'topic_id': self.topic_id,
+        }
+
+
+class DeliveryTracker:
+    """Tracks in-flight fan-outs so shutdown can drain them and checkpoint the rest."""
+
+    def __init__(self, checkpoint_path: str):
+        self.checkpoint_path = checkpoint_path
+        self.accepting = True
+        self._jobs: Dict[int, DeliveryJob] = {}
+        self._ids = count(1)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._jobs)
+
+    @contextmanager
+    def track(self, bot_token: Optional[str], message: str, parse_mode: Optional[str],
+              chat_ids: List[int], topic_id: Optional[int] = None):
+        job = DeliveryJob(next(self._ids), bot_token, message,
+                          parse_mode, chat_ids, topic_id)
+        self._jobs[job.id] = job
+        try:
+            yield job
+        finally:
+            # Once shutdown has begun, an interrupted job keeps its pending chats
+            # so they can be checkpointed; before that they are dropped as usual.
+            if not job.pending or self.accepting:
+                self._jobs.pop(job.id, None)
+
+    def _running(self) -> List[DeliveryJob]:
+        return [job for job in self._jobs.values()
+                if job.pending and not (job.task and job.task.done())]
+
+    async def shutdown(self, timeout: Optional[float] = None) -> int:
+        """Stops accepting sends, waits for in-flight jobs and checkpoints what is left.
+
+        Returns the number of chats written to the checkpoint.
+        """
+        self.accepting = False
+        timeout = Config.SHUTDOWN_DRAIN_TIMEOUT if timeout is None else timeout
+        logger.info("Draining %d in-flight notification(s), timeout %ss",
+                    len(self._running()), timeout)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._running() and loop.time() < deadline:
+            await asyncio.sleep(DRAIN_POLL_INTERVAL)
+        if self._running():
+            logger.warning("Drain timeout reached with %d notification(s) in flight",
+                           len(self._running()))
+
+        unfinished = [job for job in self._jobs.values() if job.pending]
+        # Snapshot before cancelling: the chat being sent at the deadline is kept,
+        # so delivery after resume is at-least-once.
+        self.save_checkpoint(unfinished)
+        current = asyncio.current_task()
+        tasks: Set[asyncio.Task] = {
+            job.task for job in unfinished
+            if job.task and not job.task.done() and job.task is not current}
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._jobs.clear()
+        return sum(len(job.pending) for job in unfinished)
+
+    def _write_checkpoint(self, entries: List[dict]) -> None:
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        # The file may contain custom bot tokens, so keep it owner-only.
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def save_checkpoint(self, jobs: List[DeliveryJob]) -> None:
+        if not jobs:
+            return
+        # A second shutdown pass (see app.main.lifespan) adds to the first one.
+        self._write_checkpoint(
+            self.load_checkpoint() + [job.to_dict() for job in jobs])
+        logger.info("Checkpointed %d unfinished notification(s) to %s",
+                    len(jobs), self.checkpoint_path)
+
+    def load_checkpoint(self) -> List[dict]:
+        """Reads the checkpoint left by a previous shutdown."""
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logger.error("Could not read checkpoint %s: %s",
+                         self.checkpoint_path, e)
+            return []
+
+    def replace_checkpoint(self, entries: List[dict]) -> None:
+        """Keeps only ``entries`` in the checkpoint, removing the file when there are none."""
+        if entries:
+            self._write_checkpoint(entries)
+            return
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+
+delivery_tracker = DeliveryTracker(Config.CHECKPOINT_PATH)
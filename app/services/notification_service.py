@@ -1,13 +1,17 @@
+import asyncio
 import logging
 import re
 from typing import List, Optional
 
 from aiogram import Bot
 from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramRetryAfter
 
 from app.config import Config
+from app.services.delivery_tracker import delivery_tracker
+from app.utils.logging_config import Truncated
+from app.utils.tracing import tracer
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -21,25 +25,95 @@ def escape_special_characters(text: str, format: str) -> str:
         return text
 
 
+async def _send_with_retry(bot: Bot, span, **kwargs):
+    """Sends one message, waiting out Telegram flood control up to SEND_MAX_ATTEMPTS times.
+
+    Waits longer than SEND_MAX_RETRY_WAIT are not retried, so a single chat
+    cannot hold up the HTTP request or the shutdown drain for long.
+    """
+    attempts = max(1, Config.SEND_MAX_ATTEMPTS)
+    for attempt in range(1, attempts + 1):
+        span.add_event("attempt", attempt=attempt)
+        try:
+            return await bot.send_message(**kwargs)
+        except TelegramRetryAfter as e:
+            if attempt == attempts or e.retry_after > Config.SEND_MAX_RETRY_WAIT:
+                raise
+            span.add_event("retry_after", seconds=e.retry_after)
+            logger.warning("Rate limited on chat %s, retrying in %ss",
+                           kwargs['chat_id'], e.retry_after)
+            await asyncio.sleep(e.retry_after)
+
+
 async def send_notification_to_groups(bot: Bot, message: str, parse_mode: ParseMode, chat_ids: List[int], topic_id: Optional[int] = None) -> bool:
-    logger.info(f"Sending notification: message='{message}', parse_mode={
-                parse_mode}, chat_ids={chat_ids}, topic_id={topic_id}")
+    logger.info("Sending notification: message='%s', parse_mode=%s, chats=%d, topic_id=%s",
+                Truncated(message), parse_mode, len(chat_ids), topic_id)
     all_success = True
 
     format = 'html' if parse_mode == ParseMode.HTML else 'markdown' if parse_mode == ParseMode.MARKDOWN else 'plain'
-    escaped_message = escape_special_characters(message, format)
+    with tracer.start_as_current_span("escape", format=format, length=len(message)):
+        escaped_message = escape_special_characters(message, format)
+
+    bot_token = bot.token if bot.token != Config.BOT_TOKEN else None
+    with delivery_tracker.track(bot_token, message, parse_mode, chat_ids, topic_id) as job:
+        for chat_id in chat_ids:
+            with tracer.start_as_current_span("send_message", chat_id=chat_id, topic_id=topic_id) as span:
+                try:
+                    if topic_id:
+                        await _send_with_retry(bot, span, chat_id=chat_id, text=escaped_message, parse_mode=parse_mode, message_thread_id=topic_id)
+                        logger.info("Message successfully sent to chat %s, topic %s",
+                                    chat_id, topic_id, extra={'sampled': True})
+                    else:
+                        await _send_with_retry(bot, span, chat_id=chat_id, text=escaped_message, parse_mode=parse_mode)
+                        logger.info("Message successfully sent to chat %s",
+                                    chat_id, extra={'sampled': True})
+                except Exception as e:
+                    span.record_exception(e)
+                    logger.error("Error sending message to chat %s, topic %s: %s",
+                                 chat_id, topic_id, e)
+                    all_success = False
+            job.done(chat_id)
+    return all_success
+
 
-    for chat_id in chat_ids:
+async def _resend(bot: Bot, job: dict, parse_mode: Optional[ParseMode]):
+    try:
+        await send_notification_to_groups(bot, job['message'], parse_mode, job['chat_ids'], job['topic_id'])
+    finally:
+        await bot.session.close()
+
+
+def _log_resend_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Resumed notification failed: %s", task.exception())
+
+
+async def resume_pending_notifications() -> List[asyncio.Task]:
+    """Re-sends chats checkpointed by the previous shutdown in the background.
+
+    Jobs whose bot or parse mode cannot be rebuilt stay in the checkpoint.
+    """
+    delivery_tracker.accepting = True
+    jobs = delivery_tracker.load_checkpoint()
+    if not jobs:
+        return []
+    logger.info("Resuming %d checkpointed notification(s)", len(jobs))
+    tasks = []
+    failed = []
+    for job in jobs:
         try:
-            if topic_id:
-                await bot.send_message(chat_id=chat_id, text=escaped_message, parse_mode=parse_mode, message_thread_id=topic_id)
-                logger.info(f"Message successfully sent to chat {
-                            chat_id}, topic {topic_id}")
-            else:
-                await bot.send_message(chat_id=chat_id, text=escaped_message, parse_mode=parse_mode)
-                logger.info(f"Message successfully sent to chat {chat_id}")
+            parse_mode = ParseMode(job['parse_mode']) if job['parse_mode'] else None
+            bot = Bot(token=job['bot_token'] or Config.BOT_TOKEN)
         except Exception as e:
-            logger.error(f"Error sending message to chat {
-                         chat_id}, topic {topic_id}: {e}")
-            all_success = False
-    return all_success
+            logger.error("Cannot resume notification for chats %s: %s",
+                         job['chat_ids'], e)
+            failed.append(job)
+            continue
+        task = asyncio.create_task(_resend(bot, job, parse_mode))
+        task.add_done_callback(_log_resend_failure)
+        tasks.append(task)
+    # Each task enters delivery_tracker.track() before its first await, so after
+    # one loop iteration the tracker owns their chats.
+    await asyncio.sleep(0)
+    delivery_tracker.replace_checkpoint(failed)
+    return tasks
@@ -21,12 +21,12 @@ async def log_available_chats(bot: Bot):
                         'title': chat.title
                     })
             except Exception as e:
-                logger.error(f"Error fetching chat info for ID {
-                             group_id}: {e}")
+                logger.error("Error fetching chat info for ID %s: %s",
+                             group_id, e)
 
-        logger.info(f"Available chats for bot {bot.id}:")
+        logger.info("Available chats for bot %s:", bot.id)
         for chat in available_chats:
-            logger.info(f"Chat ID: {chat['id']}, Type: {
-                        chat['type']}, Title: {chat['title']}")
+            logger.info("Chat ID: %s, Type: %s, Title: %s",
+                        chat['id'], chat['type'], chat['title'])
     except Exception as e:
-        logger.error(f"Error while fetching available chats: {e}")
+        logger.error("Error while fetching available chats: %s", e)
@@ -0,0 +1,213 @@
+import json
+import logging
+import queue
+import random
+import re
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config import Config
+from app.utils.tracing import correlation_id_var
+
+TOKEN_PATTERN = re.compile(r'\d{5,}:[A-Za-z0-9_-]{30,}')
+TOKEN_REPLACEMENT = '<redacted-token>'
+
+# Record attributes passed through ``extra=`` that end up in JSON output.
+JSON_EXTRA_FIELDS = ('correlation_id', 'chat_id', 'topic_id')
+
+UVICORN_LOGGERS = ('uvicorn', 'uvicorn.error', 'uvicorn.access')
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional['NonBlockingQueueHandler'] = None
+
+
+def redact(text: str) -> str:
+    if Config.BOT_TOKEN:
+        text = text.replace(Config.BOT_TOKEN, TOKEN_REPLACEMENT)
+    return TOKEN_PATTERN.sub(TOKEN_REPLACEMENT, text)
+
+
+class Truncated:
+    """Lazily truncates text when the log record is actually formatted."""
+
+    __slots__ = ('text', 'limit')
+
+    def __init__(self, text: str, limit: Optional[int] = None):
+        self.text = text
+        self.limit = Config.LOG_MAX_TEXT_LENGTH if limit is None else limit
+
+    def __str__(self) -> str:
+        if len(self.text) <= self.limit:
+            return self.text
+        return f"{self.text[:self.limit]}...(+{len(self.text) - self.limit} chars)"
+
+    __repr__ = __str__
+
+
+class SamplingFilter(logging.Filter):
+    """Drops records logged with ``extra={'sampled': True}`` at the given rate."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'sampled', False) or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Tags records with the correlation id of the request being handled."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        correlation_id = correlation_id_var.get()
+        if correlation_id is not None:
+            record.correlation_id = correlation_id
+        return True
+
+
+class RedactingFilter(logging.Filter):
+    """Strips bot tokens from the rendered message before it is emitted."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = redact(record.getMessage())
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        if record.exc_text:
+            record.exc_text = redact(record.exc_text)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key in JSON_EXTRA_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                payload[key] = redact(value) if isinstance(value, str) else value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Enqueues records without formatting them and drops them when the queue is full.
+
+    Formatting (including lazy ``%`` arguments) happens in the listener thread,
+    so the event loop only pays for the level check and a ``put_nowait``.
+    The last tenth of the queue is reserved for warnings and errors, and the
+    number of dropped records is reported once there is room again.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        maxsize = log_queue.maxsize
+        self.low_priority_limit = maxsize - max(1, maxsize // 10) if maxsize > 0 else 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def _has_room(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.low_priority_limit:
+            return True
+        return self.queue.qsize() < self.low_priority_limit
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if not self._has_room(record):
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.dropped and self.queue.qsize() < self.low_priority_limit:
+            self._report_dropped()
+
+    def _report_dropped(self) -> None:
+        report = logging.makeLogRecord({
+            'name': __name__,
+            'levelno': logging.WARNING,
+            'levelname': 'WARNING',
+            'msg': "Dropped %d log record(s) because the log queue was full",
+            'args': (self.dropped,),
+        })
+        try:
+            self.queue.put_nowait(report)
+        except queue.Full:
+            return
+        self.dropped = 0
+
+
+def route_uvicorn_loggers() -> None:
+    """Sends uvicorn's loggers through the root queue handler instead of their own streams.
+
+    uvicorn installs synchronous stream handlers with ``propagate=False`` when it
+    configures logging, which would bypass both the queue and token redaction.
+    """
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        for handler in uvicorn_logger.handlers[:]:
+            uvicorn_logger.removeHandler(handler)
+        uvicorn_logger.propagate = True
+
+
+def setup_logging() -> None:
+    """Routes all logging through a background thread. Safe to call more than once."""
+    global _listener, _queue_handler
+    route_uvicorn_loggers()
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    if Config.LOG_FORMAT == 'json':
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    stream_handler.addFilter(RedactingFilter())
+
+    queue_handler = NonBlockingQueueHandler(
+        queue.Queue(maxsize=Config.LOG_QUEUE_SIZE))
+    queue_handler.addFilter(SamplingFilter(Config.LOG_SUCCESS_SAMPLE_RATE))
+    queue_handler.addFilter(CorrelationIdFilter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(Config.LOG_LEVEL)
+
+    _queue_handler = queue_handler
+    _listener = QueueListener(
+        queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records, stops the background listener and logs directly from then on.
+
+    Records emitted after shutdown (such as uvicorn's final lines) are written
+    synchronously by the listener's handler instead of piling up in the queue.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    root.removeHandler(_queue_handler)
+    for handler in _listener.handlers:
+        handler.addFilter(CorrelationIdFilter())
+        root.addHandler(handler)
+    _listener = None
+    _queue_handler = None
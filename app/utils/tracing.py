@@ -0,0 +1,231 @@
+import json
+import logging
+import queue
+import random
+import secrets
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+correlation_id_var: ContextVar[Optional[str]] = ContextVar(
+    'correlation_id', default=None)
+_current_span: ContextVar[Optional['Span']] = ContextVar(
+    'current_span', default=None)
+
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex
+
+
+class Span:
+    """A timed operation. Ids and fields follow the OpenTelemetry span data model."""
+
+    recording = True
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status = 'OK'
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes) -> None:
+        self.events.append({'name': name, 'timestamp': time.time_ns(),
+                            'attributes': attributes})
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = 'ERROR'
+        self.add_event('exception', type=type(exc).__name__, message=str(exc))
+
+    def end(self) -> None:
+        self.end_time = time.time_ns()
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_id,
+            'start_time_unix_nano': self.start_time,
+            'end_time_unix_nano': self.end_time,
+            'attributes': self.attributes,
+            'events': self.events,
+            'status': self.status,
+        }
+
+
+class _NonRecordingSpan:
+    """Stands in for spans of unsampled traces so instrumentation costs almost nothing."""
+
+    recording = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def add_event(self, name: str, **attributes) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def get_finished_spans(self) -> List[Span]:
+        return list(self.spans)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends finished spans as JSON lines from a background thread.
+
+    Meant for debugging and tests; the event loop only pays for a queue put.
+    Spans are dropped when the queue is full or the writer has failed.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path: str, max_queue_size: Optional[int] = None):
+        self.path = path
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(
+            maxsize=Config.TRACE_QUEUE_SIZE if max_queue_size is None else max_queue_size)
+        self._thread = threading.Thread(
+            target=self._write, name='span-exporter', daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        if not self._thread.is_alive():
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def _write(self) -> None:
+        try:
+            with open(self.path, 'a') as f:
+                while True:
+                    item = self._queue.get()
+                    if item is self._STOP:
+                        return
+                    f.write(json.dumps(item, default=str) + '\n')
+                    # Flush once the backlog is written rather than per span.
+                    if self._queue.empty():
+                        f.flush()
+        except OSError as e:
+            logger.error("Span exporter stopped, cannot write to %s: %s",
+                         self.path, e)
+
+    def shutdown(self) -> None:
+        """Writes the remaining spans and stops the writer thread."""
+        while self._thread.is_alive():
+            try:
+                self._queue.put(self._STOP, timeout=0.1)
+            except queue.Full:
+                continue
+            self._thread.join()
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_rate: float = 0.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def _should_sample(self) -> bool:
+        if self.exporter is None or self.sample_rate <= 0:
+            return False
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    @contextmanager
+    def start_as_current_span(self, name: str, **attributes):
+        parent = _current_span.get()
+        if parent is NON_RECORDING_SPAN:
+            yield NON_RECORDING_SPAN
+            return
+        if parent is None:
+            if not self._should_sample():
+                token = _current_span.set(NON_RECORDING_SPAN)
+                try:
+                    yield NON_RECORDING_SPAN
+                finally:
+                    _current_span.reset(token)
+                return
+            span = Span(name, secrets.token_hex(16), attributes=attributes)
+            correlation_id = correlation_id_var.get()
+            if correlation_id:
+                span.set_attribute('correlation_id', correlation_id)
+        else:
+            span = Span(name, parent.trace_id, parent.span_id, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            if self.exporter is not None:
+                self.exporter.export(span)
+
+
+def _default_exporter() -> Optional[SpanExporter]:
+    if Config.TRACE_EXPORTER == 'file':
+        return FileSpanExporter(Config.TRACE_FILE_PATH)
+    if Config.TRACE_EXPORTER == 'memory':
+        return InMemorySpanExporter()
+    return None
+
+
+tracer = Tracer(_default_exporter(), Config.TRACE_SAMPLE_RATE)
+
+
+def configure_tracing(exporter: Optional[SpanExporter], sample_rate: float = 1.0) -> Tracer:
+    """Swaps the exporter and sampling rate of the shared tracer."""
+    tracer.exporter = exporter
+    tracer.sample_rate = sample_rate
+    return tracer
+
+
+def shutdown_tracing() -> None:
+    """Flushes spans still held by the exporter."""
+    if tracer.exporter is not None:
+        tracer.exporter.shutdown()
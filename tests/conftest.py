@@ -4,6 +4,7 @@ from fastapi.testclient import TestClient
 import app.services.notification_service as notification_service
 from app.config import Config
 from app.main import app
+from app.utils.tracing import InMemorySpanExporter, configure_tracing, tracer
 
 pytest_plugins = ('pytest_asyncio',)
 
@@ -24,3 +25,12 @@ def mock_bot(mocker):
 def mock_config(mocker):
     mocker.patch.object(Config, 'GROUP_IDS',)
     mocker.patch.object(Config, 'BOT_TOKEN',)
+
+
+@pytest.fixture
+def span_exporter():
+    previous = tracer.exporter, tracer.sample_rate
+    exporter = InMemorySpanExporter()
+    configure_tracing(exporter, sample_rate=1.0)
+    yield exporter
+    configure_tracing(*previous)
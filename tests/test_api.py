@@ -1,8 +1,13 @@
+import json
+
 import pytest
 from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramRetryAfter
 from fastapi import status
 
 from app.config import Config
+from app.main import WEBHOOK_PATH
+from app.services.delivery_tracker import delivery_tracker
 from app.services.notification_service import escape_special_characters
 
 pytestmark = pytest.mark.asyncio
@@ -396,3 +401,130 @@ async def test_send_notification_with_topic_id_query_param(client, mocker, mock_
             parse_mode=None,
             message_thread_id=topic_id
         )
+
+
+@pytest.mark.asyncio
+async def test_send_notification_rejected_during_shutdown(client, mocker):
+    mocker.patch.object(delivery_tracker, 'accepting', False)
+
+    response = client.post("/send_notification", json={"text": "Too late"})
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json() == {"detail": "Service is shutting down"}
+
+
+@pytest.mark.asyncio
+async def test_send_notification_returns_correlation_id(client, mocker, mock_config):
+    mock_bot = mocker.AsyncMock()
+    mocker.patch('app.api.routes.Bot', return_value=mock_bot)
+
+    response = client.post("/send_notification", json={"text": "Traced"},
+                           headers={Config.CORRELATION_ID_HEADER: "req-42"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers[Config.CORRELATION_ID_HEADER] == "req-42"
+
+    response = client.post("/send_notification", json={"text": "Traced"})
+
+    assert response.headers[Config.CORRELATION_ID_HEADER]
+
+
+@pytest.mark.asyncio
+async def test_send_notification_creates_spans(client, mocker, mock_config, span_exporter):
+    mock_bot = mocker.AsyncMock()
+    mocker.patch('app.api.routes.Bot', return_value=mock_bot)
+
+    client.post("/send_notification", json={"text": "Traced"},
+                headers={Config.CORRELATION_ID_HEADER: "req-43"})
+
+    spans = {span.name: span for span in span_exporter.get_finished_spans()}
+    request_span = spans["http_request"]
+    assert request_span.attributes["correlation_id"] == "req-43"
+    assert {"get_bot", "parse_request", "escape"} <= spans.keys()
+    send_spans = [span for span in span_exporter.get_finished_spans()
+                  if span.name == "send_message"]
+    assert [span.attributes["chat_id"] for span in send_spans] == Config.GROUP_IDS
+    assert all(span.trace_id == request_span.trace_id for span in send_spans)
+
+
+@pytest.mark.asyncio
+async def test_webhook_path_is_redacted_in_spans(client, span_exporter):
+    token = "123456789:AAFakeTokenForTestsOnly_abcdefghijklmno"
+
+    client.get(f"/bot/{token}")
+
+    client.get(WEBHOOK_PATH)
+
+    paths = [span.attributes["path"] for span in span_exporter.get_finished_spans()
+             if span.name == "http_request"]
+    assert paths == ["/bot/<redacted-token>", "/bot/<redacted-token>"]
+
+
+@pytest.mark.asyncio
+async def test_send_notification_retries_after_flood_control(client, mocker, mock_config, span_exporter):
+    mock_bot = mocker.AsyncMock()
+    mock_bot.send_message.side_effect = [
+        TelegramRetryAfter(method=mocker.Mock(), message="Flood control", retry_after=3),
+        None,
+        None,
+    ]
+    mocker.patch('app.api.routes.Bot', return_value=mock_bot)
+    sleep = mocker.patch('app.services.notification_service.asyncio.sleep')
+
+    response = client.post("/send_notification", json={"text": "Busy"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert mock_bot.send_message.call_count == 3
+    sleep.assert_awaited_once_with(3)
+    first_send = next(span for span in span_exporter.get_finished_spans()
+                      if span.name == "send_message")
+    assert [(event["name"], event["attributes"]) for event in first_send.events] == [
+        ("attempt", {"attempt": 1}),
+        ("retry_after", {"seconds": 3}),
+        ("attempt", {"attempt": 2}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_parse_request_span_covers_body_decoding(client, mocker, mock_config, span_exporter):
+    mocker.patch('app.api.routes.Bot', return_value=mocker.AsyncMock())
+    body = json.dumps({"text": "x" * 100_000}).encode()
+
+    client.post("/send_notification", content=body,
+                headers={"Content-Type": "application/json"})
+    response = client.post("/send_notification", content=b'{"text": "x", "topic_id": "abc"}',
+                           headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "topic_id"]
+    parse_spans = [span for span in span_exporter.get_finished_spans()
+                   if span.name == "parse_request"]
+    assert parse_spans[0].attributes["body_size"] == len(body)
+    assert parse_spans[1].status == "ERROR"
+
+
+@pytest.mark.asyncio
+async def test_send_notification_tries_once_when_attempts_not_positive(client, mocker, mock_config):
+    mock_bot = mocker.AsyncMock()
+    mocker.patch('app.api.routes.Bot', return_value=mock_bot)
+    mocker.patch.object(Config, 'SEND_MAX_ATTEMPTS', 0)
+
+    response = client.post("/send_notification", json={"text": "Once"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert mock_bot.send_message.call_count == len(Config.GROUP_IDS)
+
+
+@pytest.mark.asyncio
+async def test_send_notification_does_not_wait_past_retry_cap(client, mocker, mock_config):
+    mock_bot = mocker.AsyncMock()
+    mock_bot.send_message.side_effect = TelegramRetryAfter(
+        method=mocker.Mock(), message="Flood control", retry_after=600)
+    mocker.patch('app.api.routes.Bot', return_value=mock_bot)
+    sleep = mocker.patch('app.services.notification_service.asyncio.sleep')
+
+    response = client.post("/send_notification", json={"text": "Busy"})
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    sleep.assert_not_awaited()
+    assert mock_bot.send_message.call_count == len(Config.GROUP_IDS)
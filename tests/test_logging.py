@@ -0,0 +1,144 @@
+import json
+import logging
+import logging.config
+import queue
+
+import uvicorn.config
+
+from app.utils.logging_config import (JsonFormatter, NonBlockingQueueHandler,
+                                      RedactingFilter, SamplingFilter,
+                                      Truncated, redact, route_uvicorn_loggers,
+                                      setup_logging, shutdown_logging)
+
+TOKEN = "123456789:AAFakeTokenForTestsOnly_abcdefghijklmno"
+
+
+def make_record(msg, *args, **extra):
+    record = logging.LogRecord(
+        "test", logging.INFO, __file__, 1, msg, args or None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_redact_bot_token():
+    assert TOKEN not in redact(f"https://example.com/bot/{TOKEN}")
+    assert redact("chat 12345") == "chat 12345"
+
+
+def test_redacting_filter_renders_args():
+    record = make_record("Webhook set to URL: %s", f"/bot/{TOKEN}")
+
+    assert RedactingFilter().filter(record)
+    assert record.getMessage() == "Webhook set to URL: /bot/<redacted-token>"
+
+
+def test_truncated_is_lazy_and_bounded():
+    short = Truncated("hello", limit=10)
+    long = Truncated("x" * 50, limit=10)
+
+    assert str(short) == "hello"
+    assert str(long) == "x" * 10 + "...(+40 chars)"
+
+
+def test_sampling_filter_only_drops_sampled_records():
+    sampler = SamplingFilter(0.0)
+
+    assert sampler.filter(make_record("error"))
+    assert not sampler.filter(make_record("sent", sampled=True))
+    assert SamplingFilter(1.0).filter(make_record("sent", sampled=True))
+
+
+def test_json_formatter_includes_extras():
+    record = make_record("sent to %s", 42, chat_id=42)
+
+    payload = json.loads(JsonFormatter().format(record))
+
+    assert payload["message"] == "sent to 42"
+    assert payload["level"] == "INFO"
+    assert payload["chat_id"] == 42
+
+
+def test_queue_handler_drops_info_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=10))
+
+    for i in range(12):
+        handler.handle(make_record("info %s", i))
+
+    assert handler.queue.qsize() == 9
+    assert handler.dropped == 3
+
+
+def test_queue_handler_keeps_room_for_errors():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=10))
+    for i in range(9):
+        handler.handle(make_record("info %s", i))
+
+    error = make_record("send failed")
+    error.levelno, error.levelname = logging.ERROR, "ERROR"
+    handler.handle(error)
+
+    assert handler.queue.qsize() == 10
+    assert handler.dropped == 0
+
+
+def test_queue_handler_reports_dropped_records():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=10))
+    for i in range(11):
+        handler.handle(make_record("info %s", i))
+    while not handler.queue.empty():
+        handler.queue.get_nowait()
+
+    handler.handle(make_record("after"))
+
+    records = [handler.queue.get_nowait() for _ in range(2)]
+    assert records[1].levelno == logging.WARNING
+    assert records[1].getMessage() == \
+        "Dropped 2 log record(s) because the log queue was full"
+    assert handler.dropped == 0
+
+
+def test_uvicorn_access_log_is_routed_and_redacted(caplog):
+    logging.config.dictConfig(uvicorn.config.LOGGING_CONFIG)
+    route_uvicorn_loggers()
+    access_logger = logging.getLogger("uvicorn.access")
+
+    assert access_logger.handlers == []
+    assert access_logger.propagate
+
+    with caplog.at_level(logging.INFO):
+        access_logger.info('%s - "%s %s HTTP/%s" %d',
+                           "127.0.0.1:5000", "POST", f"/bot/{TOKEN}", "1.1", 200)
+
+    record = caplog.records[-1]
+    assert RedactingFilter().filter(record)
+    assert TOKEN not in record.getMessage()
+    assert "/bot/<redacted-token>" in record.getMessage()
+
+
+def test_json_formatter_skips_unknown_extras_and_redacts():
+    record = make_record("GET /", color_message="\x1b[1mGET /\x1b[0m",
+                         correlation_id=f"req-{TOKEN}", secret=TOKEN)
+
+    payload = json.loads(JsonFormatter().format(record))
+
+    assert "color_message" not in payload
+    assert "secret" not in payload
+    assert payload["correlation_id"] == "req-<redacted-token>"
+
+
+def test_records_after_shutdown_are_written_directly(capsys):
+    shutdown_logging()
+    setup_logging()
+    shutdown_logging()
+    root = logging.getLogger()
+
+    logging.getLogger("test").error("Finished server process %s", TOKEN)
+
+    assert not any(isinstance(h, NonBlockingQueueHandler) for h in root.handlers)
+    err = capsys.readouterr().err
+    assert "Finished server process <redacted-token>" in err
+    with capsys.disabled():
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        setup_logging()
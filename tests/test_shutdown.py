@@ -0,0 +1,214 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+import uvicorn
+
+from app.config import Config
+from app.main import DrainingServer, app, lifespan
+from app.services.delivery_tracker import DeliveryTracker, delivery_tracker
+from app.services.notification_service import resume_pending_notifications
+
+
+async def fan_out(tracker, chat_ids, delay=0):
+    with tracker.track(None, "hello", None, chat_ids) as job:
+        for chat_id in chat_ids:
+            await asyncio.sleep(delay)
+            job.done(chat_id)
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_in_flight_jobs(tmp_path):
+    tracker = DeliveryTracker(str(tmp_path / "pending.json"))
+    task = asyncio.create_task(fan_out(tracker, [1, 2, 3], delay=0.01))
+    await asyncio.sleep(0)
+
+    checkpointed = await tracker.shutdown(timeout=1)
+
+    assert checkpointed == 0
+    assert task.done() and not task.cancelled()
+    assert not (tmp_path / "pending.json").exists()
+    assert not tracker.accepting
+
+
+@pytest.mark.asyncio
+async def test_shutdown_checkpoints_unsent_chats_after_timeout(tmp_path):
+    path = tmp_path / "pending.json"
+    tracker = DeliveryTracker(str(path))
+    task = asyncio.create_task(fan_out(tracker, [1, 2, 3], delay=10))
+    await asyncio.sleep(0)
+
+    checkpointed = await tracker.shutdown(timeout=0.05)
+
+    assert checkpointed == 3
+    assert task.cancelled()
+    saved = json.loads(path.read_text())
+    assert saved == [{"bot_token": None, "message": "hello", "parse_mode": None,
+                      "chat_ids": [1, 2, 3], "topic_id": None}]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_is_dropped_while_accepting(tmp_path):
+    path = tmp_path / "pending.json"
+    tracker = DeliveryTracker(str(path))
+    task = asyncio.create_task(fan_out(tracker, [1, 2, 3], delay=10))
+    await asyncio.sleep(0)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert tracker.in_flight == 0
+    assert await tracker.shutdown(timeout=0) == 0
+    assert not path.exists()
+
+
+@pytest.mark.asyncio
+async def test_second_shutdown_adds_to_checkpoint(tmp_path):
+    path = tmp_path / "pending.json"
+    tracker = DeliveryTracker(str(path))
+    first = asyncio.create_task(fan_out(tracker, [1], delay=10))
+    await asyncio.sleep(0)
+    await tracker.shutdown(timeout=0)
+    second = asyncio.create_task(fan_out(tracker, [2], delay=10))
+    await asyncio.sleep(0)
+    second.cancel()
+    await asyncio.gather(first, second, return_exceptions=True)
+
+    await tracker.shutdown(timeout=0)
+
+    assert [job["chat_ids"] for job in json.loads(path.read_text())] == [[1], [2]]
+
+
+@pytest.mark.asyncio
+async def test_load_and_remove_checkpoint(tmp_path):
+    path = tmp_path / "pending.json"
+    path.write_text(json.dumps([{"bot_token": None, "message": "hi", "parse_mode": "HTML",
+                                 "chat_ids": [5], "topic_id": 7}]))
+    tracker = DeliveryTracker(str(path))
+
+    jobs = tracker.load_checkpoint()
+
+    assert jobs[0]["chat_ids"] == [5]
+    assert path.exists()
+    tracker.replace_checkpoint(jobs[:1])
+    assert json.loads(path.read_text()) == jobs
+    tracker.replace_checkpoint([])
+    assert not path.exists()
+    assert tracker.load_checkpoint() == []
+
+
+@pytest.fixture
+def tracker_checkpoint(mocker, tmp_path):
+    path = tmp_path / "pending.json"
+    mocker.patch.object(delivery_tracker, 'checkpoint_path', str(path))
+    yield path
+    delivery_tracker.accepting = True
+    delivery_tracker._jobs.clear()
+
+
+def mock_send_bot(mocker):
+    async def slow_send(**kwargs):
+        await asyncio.sleep(10)
+
+    bot = mocker.AsyncMock()
+    bot.token = Config.BOT_TOKEN
+    bot.send_message.side_effect = slow_send
+    return bot
+
+
+@pytest.mark.asyncio
+async def test_request_cancelled_after_drain_is_checkpointed_by_lifespan(mocker, tracker_checkpoint):
+    mocker.patch('app.main.Bot', return_value=mocker.AsyncMock())
+    mocker.patch('app.api.routes.Bot', return_value=mock_send_bot(mocker))
+    mocker.patch.object(Config, 'GROUP_IDS', [-1001, -1002, -1003])
+
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            request = asyncio.create_task(
+                client.post("/send_notification", json={"text": "Rolling deploy"}))
+            while not delivery_tracker.in_flight:
+                await asyncio.sleep(0.01)
+            # DrainingServer has started shutting down, then uvicorn cancels the
+            # request once timeout_graceful_shutdown runs out.
+            delivery_tracker.accepting = False
+            request.cancel()
+            await asyncio.gather(request, return_exceptions=True)
+
+    saved = json.loads(tracker_checkpoint.read_text())
+    assert saved[0]["message"] == "Rolling deploy"
+    assert saved[0]["chat_ids"] == [-1001, -1002, -1003]
+
+
+@pytest.mark.asyncio
+async def test_draining_server_drains_before_closing_connections(mocker):
+    calls = []
+    mocker.patch.object(delivery_tracker, 'shutdown',
+                        side_effect=lambda: calls.append("drain"))
+    mocker.patch.object(uvicorn.Server, 'shutdown',
+                        side_effect=lambda self, sockets=None: calls.append("close"),
+                        autospec=True)
+
+    await DrainingServer(uvicorn.Config(app)).shutdown()
+
+    assert calls == ["drain", "close"]
+
+
+@pytest.mark.asyncio
+async def test_resume_removes_checkpoint_once_jobs_are_tracked(mocker, tracker_checkpoint):
+    tracker_checkpoint.write_text(json.dumps([{"bot_token": None, "message": "hi", "parse_mode": None,
+                                               "chat_ids": [5, 6], "topic_id": None}]))
+    bot = mock_send_bot(mocker)
+    mocker.patch('app.services.notification_service.Bot', return_value=bot)
+
+    tasks = await resume_pending_notifications()
+
+    assert not tracker_checkpoint.exists()
+    assert delivery_tracker.in_flight == 1
+    await delivery_tracker.shutdown(timeout=0)
+    assert json.loads(tracker_checkpoint.read_text())[0]["chat_ids"] == [5, 6]
+    assert all(task.done() for task in tasks)
+
+
+@pytest.mark.asyncio
+async def test_resume_keeps_jobs_that_cannot_be_rebuilt(mocker, tracker_checkpoint, caplog):
+    bad = {"bot_token": "not-a-token", "message": "hi", "parse_mode": None,
+           "chat_ids": [7], "topic_id": None}
+    good = {"bot_token": None, "message": "hi", "parse_mode": None,
+            "chat_ids": [8], "topic_id": None}
+    tracker_checkpoint.write_text(json.dumps([bad, good]))
+    bot = mock_send_bot(mocker)
+
+    def make_bot(token):
+        if token == "not-a-token":
+            raise ValueError("Token is invalid!")
+        return bot
+
+    mocker.patch('app.services.notification_service.Bot', side_effect=make_bot)
+
+    tasks = await resume_pending_notifications()
+
+    assert len(tasks) == 1
+    assert delivery_tracker.in_flight == 1
+    assert json.loads(tracker_checkpoint.read_text()) == [bad]
+    assert "Cannot resume notification for chats [7]" in caplog.text
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_resume_logs_task_failures(mocker, tracker_checkpoint, caplog):
+    tracker_checkpoint.write_text(json.dumps([{"bot_token": None, "message": "hi", "parse_mode": None,
+                                               "chat_ids": [5], "topic_id": None}]))
+    bot = mocker.AsyncMock()
+    bot.token = Config.BOT_TOKEN
+    mocker.patch('app.services.notification_service.Bot', return_value=bot)
+    mocker.patch('app.services.notification_service.send_notification_to_groups',
+                 side_effect=RuntimeError("boom"))
+
+    tasks = await resume_pending_notifications()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert "Resumed notification failed: boom" in caplog.text
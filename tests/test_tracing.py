@@ -0,0 +1,108 @@
+import json
+import os
+
+import pytest
+
+from app.utils.tracing import (NON_RECORDING_SPAN, FileSpanExporter,
+                               InMemorySpanExporter, Span, Tracer,
+                               correlation_id_var)
+
+
+def test_child_spans_share_trace_and_link_to_parent():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter, sample_rate=1.0)
+
+    with tracer.start_as_current_span("request") as root:
+        with tracer.start_as_current_span("send_message", chat_id=1) as child:
+            child.add_event("attempt", attempt=1)
+
+    child_span, root_span = exporter.get_finished_spans()
+    assert root_span is root and child_span is child
+    assert child.trace_id == root.trace_id
+    assert child.parent_id == root.span_id
+    assert child.attributes == {"chat_id": 1}
+    assert child.events[0]["name"] == "attempt"
+    assert child.end_time >= child.start_time
+
+
+def test_root_span_carries_correlation_id():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter, sample_rate=1.0)
+    token = correlation_id_var.set("abc123")
+    try:
+        with tracer.start_as_current_span("request"):
+            pass
+    finally:
+        correlation_id_var.reset(token)
+
+    assert exporter.spans[0].attributes["correlation_id"] == "abc123"
+
+
+def test_exception_marks_span_as_error():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter, sample_rate=1.0)
+
+    with pytest.raises(ValueError):
+        with tracer.start_as_current_span("request"):
+            raise ValueError("boom")
+
+    span = exporter.spans[0]
+    assert span.status == "ERROR"
+    assert span.events[0]["attributes"] == {"type": "ValueError", "message": "boom"}
+
+
+def test_unsampled_trace_records_nothing():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter, sample_rate=0.0)
+
+    with tracer.start_as_current_span("request") as root:
+        with tracer.start_as_current_span("send_message") as child:
+            child.add_event("attempt", attempt=1)
+
+    assert root is NON_RECORDING_SPAN and child is NON_RECORDING_SPAN
+    assert exporter.spans == []
+
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(FileSpanExporter(str(path)), sample_rate=1.0)
+
+    with tracer.start_as_current_span("request"):
+        with tracer.start_as_current_span("escape"):
+            pass
+    tracer.exporter.shutdown()
+
+    names = [json.loads(line)["name"] for line in path.read_text().splitlines()]
+    assert names == ["escape", "request"]
+
+
+def test_file_exporter_stops_when_file_cannot_be_opened(tmp_path, caplog):
+    exporter = FileSpanExporter(str(tmp_path / "missing" / "traces.jsonl"))
+    exporter._thread.join()
+    tracer = Tracer(exporter, sample_rate=1.0)
+
+    with tracer.start_as_current_span("request"):
+        pass
+    exporter.shutdown()
+
+    assert "Span exporter stopped" in caplog.text
+    assert exporter.dropped == 1
+
+
+def test_file_exporter_drops_spans_when_queue_is_full(tmp_path):
+    path = tmp_path / "traces.fifo"
+    os.mkfifo(path)
+    # Opening a FIFO for writing blocks until a reader appears, so the
+    # writer thread never drains the queue.
+    exporter = FileSpanExporter(str(path), max_queue_size=1)
+    span = Span("request", "0" * 32)
+
+    exporter.export(span)
+    exporter.export(span)
+
+    assert exporter.dropped == 1
+    reader = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    try:
+        exporter.shutdown()
+    finally:
+        os.close(reader)